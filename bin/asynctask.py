@@ -16,12 +16,6 @@
 from __future__ import print_function, unicode_literals
 import sys
 import os
-import copy
-import fnmatch
-import pprint
-import tempfile
-import codecs
-import shutil
 
 
 #----------------------------------------------------------------------
@@ -33,14 +27,6 @@ if sys.version_info[0] >= 3:
 
 
 UNIX = (sys.platform[:3] != 'win') and True or False
-HAS_READLINE = False
-
-if UNIX:
-    try:
-        import readline
-        HAS_READLINE = True
-    except ImportError:
-        pass
 
 
 #----------------------------------------------------------------------
@@ -204,16 +190,338 @@ def load_ini_file (ininame, codec = None):
     return config
 
 
+#----------------------------------------------------------------------
+# stat signature used to validate cached entries: (mtime, size, inode)
+#----------------------------------------------------------------------
+def file_signature (filename):
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    mtime = getattr(st, 'st_mtime_ns', None)
+    if mtime is None:
+        mtime = int(st.st_mtime * 1000000000)
+    return (mtime, st.st_size, st.st_ino)
+
+
+#----------------------------------------------------------------------
+# replace dst with src atomically (os.replace is not available in 2.x)
+#----------------------------------------------------------------------
+def file_replace (src, dst):
+    if 'replace' in os.__dict__:
+        os.replace(src, dst)
+    else:
+        if sys.platform[:3] == 'win' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+    return 0
+
+
+#----------------------------------------------------------------------
+# location of the cache directory
+#----------------------------------------------------------------------
+def cache_home ():
+    path = os.environ.get('VIM_TASK_CACHE_DIR', '').strip()
+    if path:
+        return os.path.abspath(os.path.expanduser(path))
+    path = os.environ.get('XDG_CACHE_HOME', '').strip()
+    if not path:
+        path = os.path.expanduser('~/.cache')
+    return os.path.abspath(os.path.join(path, 'asynctask'))
+
+
+#----------------------------------------------------------------------
+# DiskCache: persistent marshal store with size cap and LRU eviction
+#----------------------------------------------------------------------
+class DiskCache (object):
+
+    def __init__ (self, path = None, limit = None):
+        self.path = path and path or cache_home()
+        self.limit = limit and limit or (16 << 20)
+        self.version = 'asynctask-1|%d.%d'%tuple(sys.version_info[:2])
+        self.ready = False
+
+    # zlib checksums are much cheaper to import than hashlib, and the
+    # full key is verified on load so collisions only cause a miss
+    def __filename (self, category, key):
+        import zlib
+        text = (self.version + '|' + category + '|' + key).encode('utf-8')
+        crc = zlib.crc32(text) & 0xffffffff
+        adler = zlib.adler32(text) & 0xffffffff
+        digest = '%08x%08x'%(crc, adler)
+        return os.path.join(self.path, category + '-' + digest + '.bin')
+
+    def get (self, category, key, sign):
+        import marshal
+        filename = self.__filename(category, key)
+        try:
+            with open(filename, 'rb') as fp:
+                entry = marshal.loads(fp.read())
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(entry, tuple) or len(entry) != 3:
+            return None
+        if entry[0] != key or entry[1] != sign:
+            return None
+        try:
+            os.utime(filename, None)
+        except OSError:
+            pass
+        return entry[2]
+
+    def put (self, category, key, sign, value):
+        import marshal
+        if not self.ready:
+            if not os.path.isdir(self.path):
+                try:
+                    os.makedirs(self.path)
+                except OSError:
+                    return -1
+            self.ready = True
+        filename = self.__filename(category, key)
+        temp = filename + '.%d.tmp'%os.getpid()
+        try:
+            data = marshal.dumps((key, sign, value))
+            with open(temp, 'wb') as fp:
+                fp.write(data)
+            file_replace(temp, filename)
+        except (IOError, OSError, ValueError):
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            return -2
+        self.evict()
+        return 0
+
+    def remove (self, category, key):
+        try:
+            os.remove(self.__filename(category, key))
+        except OSError:
+            return -1
+        return 0
+
+    # drop least recently used entries until the size cap is satisfied
+    def evict (self, limit = None):
+        limit = self.limit if limit is None else limit
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith('.bin'):
+                continue
+            filename = os.path.join(self.path, name)
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, filename))
+            total += st.st_size
+        if total <= limit:
+            return 0
+        entries.sort()
+        count = 0
+        for mtime, size, filename in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            total -= size
+            count += 1
+        return count
+
+
+#----------------------------------------------------------------------
+# FileWatcher: report changes of files (which may not exist yet) with
+# inotify when available, otherwise by polling their stat signatures
+#----------------------------------------------------------------------
+class FileWatcher (object):
+
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x1000000
+
+    def __init__ (self, interval = 0, inotify = True):
+        self.interval = interval
+        self.callbacks = {}
+        self.polling = {}
+        self.dirs = {}
+        self.wds = {}
+        self.fd = -1
+        self.ts = 0
+        if inotify:
+            self.__init_inotify()
+
+    def __init_inotify (self):
+        if not sys.platform.startswith('linux'):
+            return -1
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno = True)
+            init = libc.inotify_init1
+            add = libc.inotify_add_watch
+            rm = libc.inotify_rm_watch
+        except (ImportError, OSError, AttributeError):
+            return -2
+        init.argtypes = [ ctypes.c_int ]
+        init.restype = ctypes.c_int
+        add.argtypes = [ ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32 ]
+        add.restype = ctypes.c_int
+        rm.argtypes = [ ctypes.c_int, ctypes.c_int ]
+        rm.restype = ctypes.c_int
+        fd = init(0x800 | 0x80000)    # IN_NONBLOCK | IN_CLOEXEC
+        if fd < 0:
+            return -3
+        self.fd = fd
+        self.inotify_add_watch = add
+        self.inotify_rm_watch = rm
+        return 0
+
+    def __watch_dir (self, dirname):
+        if dirname in self.dirs:
+            return 0
+        if self.fd < 0:
+            return -1
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE
+        mask |= self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE
+        mask |= self.IN_DELETE | self.IN_DELETE_SELF | self.IN_MOVE_SELF
+        mask |= self.IN_ONLYDIR
+        path = dirname.encode(sys.getfilesystemencoding(), 'ignore')
+        wd = self.inotify_add_watch(self.fd, path, mask)
+        if wd < 0:
+            return -2
+        self.dirs[dirname] = wd
+        self.wds[wd] = dirname
+        return 0
+
+    # the directory is gone or moved: poll its files from now on
+    def __drop_dir (self, wd, changed):
+        dirname = self.wds.pop(wd, None)
+        if dirname is None:
+            return 0
+        self.dirs.pop(dirname, None)
+        self.inotify_rm_watch(self.fd, wd)
+        for name in self.callbacks:
+            if os.path.dirname(name) == dirname:
+                self.polling[name] = file_signature(name)
+                changed.add(name)
+        return 0
+
+    def __read_events (self, changed):
+        import struct
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except OSError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + 16 <= len(data):
+                wd, mask, _, size = struct.unpack_from('iIII', data, offset)
+                name = data[offset + 16:offset + 16 + size].rstrip(b'\0')
+                offset += 16 + size
+                if mask & self.IN_Q_OVERFLOW:
+                    changed.update(self.callbacks)
+                    continue
+                dirname = self.wds.get(wd)
+                if dirname is None:
+                    continue
+                if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                    self.__drop_dir(wd, changed)
+                    continue
+                if mask & self.IN_IGNORED:
+                    self.__drop_dir(wd, changed)
+                    continue
+                if not name:
+                    continue
+                name = name.decode(sys.getfilesystemencoding(), 'ignore')
+                filename = os.path.join(dirname, name)
+                if filename in self.callbacks:
+                    changed.add(filename)
+        return 0
+
+    # callback(filename) is invoked from poll() when the file changes
+    def watch (self, filename, callback):
+        filename = os.path.abspath(filename)
+        if filename not in self.callbacks:
+            self.callbacks[filename] = []
+            if self.__watch_dir(os.path.dirname(filename)) != 0:
+                self.polling[filename] = file_signature(filename)
+        self.callbacks[filename].append(callback)
+        return 0
+
+    def unwatch (self, callback):
+        for filename in list(self.callbacks.keys()):
+            callbacks = self.callbacks[filename]
+            callbacks[:] = [ n for n in callbacks if n != callback ]
+            if not callbacks:
+                del self.callbacks[filename]
+                self.polling.pop(filename, None)
+        return 0
+
+    # dispatch pending changes, returns how many files changed
+    def poll (self):
+        changed = set()
+        if self.fd >= 0:
+            self.__read_events(changed)
+        if self.polling:
+            import time
+            now = time.time()
+            if now - self.ts >= self.interval:
+                self.ts = now
+                for filename in self.polling:
+                    sign = file_signature(filename)
+                    if sign != self.polling[filename]:
+                        self.polling[filename] = sign
+                        changed.add(filename)
+        for filename in changed:
+            for callback in list(self.callbacks.get(filename, [])):
+                callback(filename)
+        return len(changed)
+
+    def close (self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+        self.callbacks = {}
+        self.polling = {}
+        self.dirs = {}
+        self.wds = {}
+        return 0
+
+
 #----------------------------------------------------------------------
 # Prettify Terminal Text
 #----------------------------------------------------------------------
 class PrettyText (object):
 
     def __init__ (self):
+        self.handle = None
+        self.term_size = None
+
+    # terminal probing is deferred until something is actually printed
+    def __getattr__ (self, name):
+        if name not in ('isatty', 'term256', 'names'):
+            raise AttributeError(name)
         self.isatty = sys.__stdout__.isatty()
         self.term256 = False
         self.names = self.__init_names()
-        self.handle = None
+        return self.__dict__[name]
 
     def __init_win32 (self):
         if sys.platform[:3] != 'win':
@@ -365,6 +673,8 @@ class PrettyText (object):
         return 0
 
     def get_term_size (self):
+        if self.term_size:
+            return (self.term_size[0], self.term_size[1])
         if sys.version_info[0] >= 30:
             import shutil
             if 'get_terminal_size' in shutil.__dict__:
@@ -416,9 +726,13 @@ pretty = PrettyText()
 #----------------------------------------------------------------------
 class configure (object):
 
-    def __init__ (self, path = None):
+    def __init__ (self, path = None, cache = True):
         self.win32 = sys.platform[:3] == 'win' and True or False
         self._cache = {}
+        self._disk = None
+        self._persist = cache
+        self._watcher = None
+        self.stale = False
         if not path:
             path = os.getcwd()
         else:
@@ -452,16 +766,26 @@ class configure (object):
             key = ininame.replace("\\", '/').lower()
         if key in self._cache:
             return self._cache[key]
+        sign = None
+        if self._disk is not None:
+            sign = file_signature(ininame)
+            if sign is not None:
+                config = self._disk.get('ini', key, sign)
+                if config is not None:
+                    self._cache[key] = config
+                    return config
         config = load_ini_file(ininame)
         self._cache[key] = config
         inihome = os.path.dirname(ininame)
         for sect in config:
             section = config[sect]
-            for key in list(section.keys()):
-                val = section[key]
+            for name in list(section.keys()):
+                val = section[name]
                 val = val.replace('$(VIM_INIHOME)', inihome)
                 val = val.replace('$(VIM_ININAME)', ininame)
-                section[key] = val
+                section[name] = val
+        if sign is not None:
+            self._disk.put('ini', key, sign, config)
         return config
 
     def find_root (self, path, markers = None, fallback = False):
@@ -531,12 +855,15 @@ class configure (object):
         self.global_config = []
         self.config = {}
         self.feature = {}
+        self._loaded = None
+        self._names = None
         # load ~/.config
         xdg = os.path.expanduser('~/.config')
         if self.check_environ('XDG_CONFIG_HOME'):
             xdg = os.environ['XDG_CONFIG_HOME']
         name = os.path.join(xdg, 'asynctask/asynctask.ini')
         name = os.path.abspath(name)
+        self.setting_name = name
         if os.path.exists(name):
             self.config = self.read_ini(name)
         if 'default' not in self.config:
@@ -545,6 +872,9 @@ class configure (object):
         self.system = setting.get('system', self.system).strip()
         self.cfg_name = setting.get('cfg_name', self.cfg_name).strip()
         self.rtp_name = setting.get('rtp_name', self.rtp_name).strip()
+        if self._persist:
+            if setting.get('cache', '1').strip() not in ('0', 'no', 'false'):
+                self._disk = self._setup_cache(setting)
         self.global_config.append('~/.vim/' + self.rtp_name)
         self.global_config.append(os.path.join(xdg, 'nvim', self.rtp_name))
         self.global_config.append('~/.config/asynctask/' + self.rtp_name)
@@ -581,6 +911,19 @@ class configure (object):
                     self.global_config.append(os.path.abspath(path))
         return 0
 
+    def _setup_cache (self, setting):
+        if self.check_environ('VIM_TASK_NO_CACHE'):
+            return None
+        path = setting.get('cache_dir', '').strip()
+        if path:
+            path = os.path.abspath(os.path.expanduser(path))
+        limit = None
+        try:
+            limit = int(setting.get('cache_size', '0').strip()) << 20
+        except ValueError:
+            pass
+        return DiskCache(path, limit)
+
     def _root_detect (self):
         self.mark = '.git,.svn,.project,.hg,.root'
         if 'root_marker' in self.config['default']:
@@ -648,7 +991,7 @@ class configure (object):
         return 0
 
     # search for global configs
-    def collect_rtp_config (self):
+    def collect_rtp_names (self):
         names = []
         for path in self.global_config:
             if '~' in path:
@@ -664,8 +1007,10 @@ class configure (object):
                 newname.append(name)
                 checker[key] = 1
         newname.reverse()
-        names = newname
-        for name in names:
+        return newname
+
+    def collect_rtp_config (self):
+        for name in self.collect_rtp_names():
             obj = self.read_ini(name)
             self.config_merge(self.tasks, obj, name, 'global')
         return 0
@@ -683,39 +1028,127 @@ class configure (object):
         output.reverse()
         return output
 
-    # search for local configs
-    def collect_local_config (self):
-        names = self.search_parent(self.home)
+    # every place a local config may appear, existing or not
+    def local_candidates (self):
+        names = []
         parts = self.cfg_name.split(',')
-        for name in names:
+        for name in self.search_parent(self.home):
             for part in parts:
                 part = part.strip('\r\n\t ')
                 if not part:
                     continue
-                t = os.path.abspath(os.path.join(name, part))
-                if os.path.exists(t):
-                    obj = self.read_ini(t)
-                    self.config_merge(self.tasks, obj, t, 'local')
+                names.append(os.path.abspath(os.path.join(name, part)))
+        return names
+
+    # search for local configs
+    def collect_local_names (self):
+        return [ n for n in self.local_candidates() if os.path.exists(n) ]
+
+    def collect_local_config (self):
+        for name in self.collect_local_names():
+            obj = self.read_ini(name)
+            self.config_merge(self.tasks, obj, name, 'local')
         return 0
 
+    # ordered (ininame, mode) list, remembered while being watched
+    def collect_sources (self):
+        if self._names is not None:
+            return self._names
+        sources = [ (n, 'global') for n in self.collect_rtp_names() ]
+        sources += [ (n, 'local') for n in self.collect_local_names() ]
+        if self._watcher is not None:
+            self._names = sources
+        return sources
+
+    # keep loaded configs warm and drop only what changes on disk
+    def watch (self, watcher = None):
+        if watcher is None:
+            watcher = FileWatcher()
+        self.unwatch()
+        self._watcher = watcher
+        self._names = None
+        names = [self.setting_name]
+        for path in self.global_config:
+            names.append(os.path.abspath(os.path.expanduser(path)))
+        names += self.local_candidates()
+        for name in names:
+            watcher.watch(name, self._invalidate)
+        return watcher
+
+    def unwatch (self):
+        if self._watcher is not None:
+            self._watcher.unwatch(self._invalidate)
+            self._watcher = None
+        self._names = None
+        return 0
+
+    def _invalidate (self, filename):
+        key = filename
+        if self.win32:
+            key = filename.replace("\\", '/').lower()
+        self._cache.pop(key, None)
+        if filename == self.setting_name:
+            self.stale = True
+        self._names = None
+        self._loaded = None
+        return 0
+
+    def _snapshot_name (self, sources):
+        features = [ n for n in self.feature if self.feature[n] ]
+        features.sort()
+        key = [self.profile, self.system, ','.join(features)]
+        for name, mode in sources:
+            key.append(mode + ':' + name)
+        return '\n'.join(key)
+
+    # cache key and signature of the merged task table
+    def _snapshot_key (self, sources):
+        sign = []
+        for name, mode in sources:
+            t = file_signature(name)
+            if t is None:
+                return None, None
+            sign.append(t)
+        return self._snapshot_name(sources), tuple(sign)
+
     # merge global and local config
     def load_tasks (self):
-        self.tasks = {}
-        self.collect_rtp_config()
-        self.collect_local_config()
-        self.environ = self.tasks.get('*', {})
-        self.environ.update(self.tasks.get('+', {}))
+        if self._watcher is not None:
+            self._watcher.poll()
+        sources = self.collect_sources()
+        if self._watcher is not None and self._loaded is not None:
+            if self._loaded[0] == self._snapshot_name(sources):
+                return 0
+        key, sign = self._snapshot_key(sources)
+        if key is not None and self._loaded == (key, sign):
+            return 0
+        snapshot = None
+        if self._disk is not None and key is not None:
+            snapshot = self._disk.get('tasks', key, sign)
+        if snapshot is not None:
+            self.tasks, self.environ, self.avail = snapshot
+        else:
+            self.tasks = {}
+            for name, mode in sources:
+                obj = self.read_ini(name)
+                self.config_merge(self.tasks, obj, name, mode)
+            self.environ = self.tasks.get('*', {})
+            self.environ.update(self.tasks.get('+', {}))
+            self.avail = []
+            keys = list(self.tasks.keys())
+            keys.sort()
+            for name in keys:
+                if name in self.reserved:
+                    continue
+                self.avail.append(name)
+            if self._disk is not None and key is not None:
+                snapshot = (self.tasks, self.environ, self.avail)
+                self._disk.put('tasks', key, sign, snapshot)
         self.setting = {}
-        setting = self.reserved
-        for name in setting:
+        for name in self.reserved:
             self.setting[name] = self.tasks.get(name, {})
-        self.avail = []
-        keys = list(self.tasks.keys())
-        keys.sort()
-        for key in keys:
-            if key in setting:
-                continue
-            self.avail.append(key)
+        if key is not None:
+            self._loaded = (key, sign)
         return 0
 
     # extract file type
@@ -734,6 +1167,7 @@ class configure (object):
             for rule in rules:
                 if not rule:
                     continue
+                import fnmatch
                 if fnmatch.fnmatch(name, rule):
                     return ft
         return None
@@ -846,15 +1280,23 @@ class configure (object):
         return text
 
 
+#----------------------------------------------------------------------
+# raised when a task needs to prompt but prompting is disabled
+#----------------------------------------------------------------------
+class InputRequired (Exception):
+    pass
+
+
 #----------------------------------------------------------------------
 # manager
 #----------------------------------------------------------------------
 class TaskManager (object):
 
-    def __init__ (self, path):
-        self.config = configure(path)
+    def __init__ (self, path, cache = True):
+        self.config = configure(path, cache)
         self.code = 0
         self.verbose = False
+        self.prompt = True
 
     def option_select (self, task, name):
         command = task.get(name, '')
@@ -946,10 +1388,18 @@ class TaskManager (object):
             shadow = self.config.shadow['-']
             if name in shadow:
                 return shadow[name]
+        if not self.prompt:
+            raise InputRequired(name)
         if ',' not in tail:
             prompt = 'Input argument (%s): '%name
             # for linux like system, using readline for editable default value
-            if UNIX and HAS_READLINE: 
+            readline = None
+            if UNIX:
+                try:
+                    import readline
+                except ImportError:
+                    readline = None
+            if readline is not None:
                 text = ''
                 try:
                     readline.set_startup_hook(lambda: readline.insert_text(tail))
@@ -1003,7 +1453,7 @@ class TaskManager (object):
             opts.cwd = self.config.macros_replace(opts.cwd, opts.macros)
         return opts
 
-    def execute (self, opts):
+    def command_expand (self, opts):
         command = opts.command
         macros = opts.macros
         macros['VIM_CWD'] = os.getcwd()
@@ -1020,7 +1470,11 @@ class TaskManager (object):
                 macros['WSL_RELNAME'] = self.config.path_win2unix(y)
         command = self.config.environ_replace(command)
         command = self.config.macros_replace(command, macros)
-        command = command.strip()
+        return command.strip()
+
+    def execute (self, opts):
+        command = self.command_expand(opts)
+        macros = opts.macros
         for name in macros:
             value = macros.get(name, None)
             if value is not None:
@@ -1187,6 +1641,7 @@ class TaskManager (object):
                     width = len(name)
             for row in rows:
                 row[0] = row[0] + ' ' * (width - len(row[0]) + 2)
+            import tempfile, codecs, shutil
             tmpdir = tempfile.mkdtemp('asynctask')
             tmpname = os.path.join(tmpdir, 'fzf.txt')
             tmprecv = os.path.join(tmpdir, 'output.txt')
@@ -1219,6 +1674,309 @@ class TaskManager (object):
         return 0
 
 
+#----------------------------------------------------------------------
+# location of the daemon socket
+#----------------------------------------------------------------------
+def server_address ():
+    path = os.environ.get('VIM_TASK_SOCKET', '').strip()
+    if path:
+        return os.path.abspath(os.path.expanduser(path))
+    uid = os.getuid() if 'getuid' in os.__dict__ else 0
+    return os.path.join(cache_home(), 'server-%d.sock'%uid)
+
+
+#----------------------------------------------------------------------
+# send one json request to the daemon, returns None if unavailable
+#----------------------------------------------------------------------
+def server_request (request, address = None, timeout = 10):
+    import socket, json
+    address = address and address or server_address()
+    if 'AF_UNIX' not in socket.__dict__:
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    chunks = []
+    try:
+        sock.connect(address)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+    except (socket.error, socket.timeout):
+        return None
+    finally:
+        sock.close()
+    try:
+        reply = json.loads(b''.join(chunks).decode('utf-8'))
+    except ValueError:
+        return None
+    if not isinstance(reply, dict):
+        return None
+    return reply
+
+
+#----------------------------------------------------------------------
+# TaskRemote: resolves commands for a client instead of running them
+#----------------------------------------------------------------------
+class TaskRemote (TaskManager):
+
+    def __init__ (self, path, cache = True):
+        super(TaskRemote, self).__init__(path, cache)
+        self.prompt = False
+        self.profile = self.config.profile
+        self.result = None
+
+    def reset (self):
+        self.config.profile = self.profile
+        self.config.shadow = {}
+        self.config._root_detect()
+        self.verbose = False
+        self.code = 0
+        self.result = None
+        return 0
+
+    def execute (self, opts):
+        command = self.command_expand(opts)
+        environ = {}
+        for name in opts.macros:
+            value = opts.macros.get(name, None)
+            if value is not None:
+                environ[name] = value
+        if self.verbose:
+            pretty.echo('white', '+ ' + command + '\n')
+        if not command:
+            return 0
+        self.result = {'command': command, 'cwd': os.getcwd()}
+        self.result['environ'] = environ
+        return 0
+
+
+#----------------------------------------------------------------------
+# TaskServer: keep configure state warm and serve requests over a
+# unix domain socket, one newline terminated json object each way
+#----------------------------------------------------------------------
+class TaskServer (object):
+
+    def __init__ (self, address = None, limit = 64):
+        self.address = address and address or server_address()
+        self.limit = limit
+        self.managers = {}
+        self.watcher = None
+        self.current = None
+        self.running = False
+
+    # forget every manager and the files they were watching
+    def reset (self):
+        self.managers = {}
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+        return 0
+
+    # factory passed to main(), reuses managers until an ini file changes
+    def manager (self, path, cache = True):
+        if self.watcher is None:
+            self.watcher = FileWatcher()
+        self.watcher.poll()
+        home = path and os.path.abspath(path) or os.getcwd()
+        names = [ n for n in os.environ if n.startswith('VIM_TASK_') ]
+        names += ['HOME', 'XDG_CONFIG_HOME']
+        names.sort()
+        env = tuple([ (n, os.environ.get(n, '')) for n in names ])
+        key = (home, cache, env)
+        tm = self.managers.get(key)
+        if tm is not None and tm.config.stale:
+            tm.config.unwatch()
+            tm = None
+        if tm is None:
+            if len(self.managers) >= self.limit:
+                self.reset()
+                self.watcher = FileWatcher()
+            tm = TaskRemote(path, cache)
+            tm.config.watch(self.watcher)
+            self.managers[key] = tm
+        else:
+            tm.reset()
+        self.current = tm
+        return tm
+
+    # run main() as the client would, with its cwd, environ and terminal
+    def execute (self, request):
+        import io
+        argv = [ n for n in request.get('argv', []) ]
+        saved_env = dict(os.environ)
+        saved_cwd = os.getcwd()
+        saved_io = (sys.stdout, sys.stderr)
+        saved_tty = (pretty.isatty, pretty.term_size)
+        self.current = None
+        reply = {}
+        try:
+            os.environ.clear()
+            os.environ.update(request.get('environ', {}))
+            os.chdir(request.get('cwd', saved_cwd))
+            sys.stdout = io.StringIO()
+            sys.stderr = io.StringIO()
+            pretty.isatty = request.get('isatty', False)
+            pretty.term_size = request.get('size', None)
+            args = ['asynctask', '--no-server'] + argv
+            reply['code'] = main(args, self.manager)
+            reply['stdout'] = sys.stdout.getvalue()
+            reply['stderr'] = sys.stderr.getvalue()
+            tm = self.current
+            if tm is not None and tm.result is not None:
+                reply.update(tm.result)
+        except InputRequired:
+            reply = {'fallback': True}
+        except Exception:
+            # anything unusual (vanished cwd, bugs) is left to the
+            # client, which will run the request in-process
+            self.reset()
+            reply = {'fallback': True}
+        finally:
+            sys.stdout, sys.stderr = saved_io
+            pretty.isatty, pretty.term_size = saved_tty
+            os.environ.clear()
+            os.environ.update(saved_env)
+            os.chdir(saved_cwd)
+        return reply
+
+    def dispatch (self, request):
+        op = request.get('op', '')
+        if op == 'ping':
+            return {'code': 0, 'pid': os.getpid()}
+        elif op == 'stop':
+            self.running = False
+            return {'code': 0}
+        elif op == 'exec':
+            return self.execute(request)
+        return {'code': 1, 'stderr': 'unknown operation: %s\n'%op}
+
+    def handle (self, conn):
+        import json
+        conn.settimeout(10)
+        data = b''
+        while b'\n' not in data:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+            if len(data) > (16 << 20):
+                return -1
+        try:
+            request = json.loads(data.decode('utf-8'))
+        except ValueError:
+            return -2
+        if not isinstance(request, dict):
+            return -3
+        reply = self.dispatch(request)
+        conn.sendall(json.dumps(reply).encode('utf-8') + b'\n')
+        return 0
+
+    def serve (self):
+        import socket, signal
+        if 'AF_UNIX' not in socket.__dict__:
+            pretty.error('unix domain socket is not supported')
+            return 1
+        address = self.address
+        dirname = os.path.dirname(address)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        if os.path.exists(address):
+            if server_request({'op': 'ping'}, address) is not None:
+                pretty.error('server is already running: %s'%address)
+                return 2
+            os.remove(address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o077)
+        try:
+            sock.bind(address)
+        finally:
+            os.umask(umask)
+        sock.listen(16)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        pretty.isatty    # probe the terminal before requests override it
+        self.running = True
+        try:
+            while self.running:
+                conn, _ = sock.accept()
+                try:
+                    self.handle(conn)
+                except (socket.error, socket.timeout):
+                    pass
+                finally:
+                    conn.close()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock.close()
+            self.reset()
+            try:
+                os.remove(address)
+            except OSError:
+                pass
+        return 0
+
+
+#----------------------------------------------------------------------
+# --serve, --serve=stop and --serve=status
+#----------------------------------------------------------------------
+def server_main (mode):
+    address = server_address()
+    if not mode:
+        return TaskServer(address).serve()
+    elif mode == 'stop':
+        if server_request({'op': 'stop'}, address) is None:
+            pretty.error('server is not running')
+            return 1
+        return 0
+    elif mode == 'status':
+        reply = server_request({'op': 'ping'}, address)
+        if reply is None:
+            print('server is not running')
+            return 1
+        print('server is running (pid %s): %s'%(reply.get('pid'), address))
+        return 0
+    pretty.error('unknown server mode: %s'%mode)
+    return 1
+
+
+#----------------------------------------------------------------------
+# forward a command line to the daemon, returns None to fall back
+#----------------------------------------------------------------------
+def client_main (argv):
+    address = server_address()
+    if not os.path.exists(address):
+        return None
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        return None
+    request = {'op': 'exec', 'argv': argv, 'cwd': cwd}
+    request['environ'] = dict(os.environ)
+    request['isatty'] = pretty.isatty
+    if pretty.isatty:
+        request['size'] = pretty.get_term_size()
+    reply = server_request(request, address)
+    if reply is None or reply.get('fallback'):
+        return None
+    if reply.get('stdout'):
+        sys.stdout.write(reply['stdout'])
+        sys.stdout.flush()
+    if reply.get('stderr'):
+        sys.stderr.write(reply['stderr'])
+        sys.stderr.flush()
+    command = reply.get('command')
+    if command:
+        if reply.get('cwd'):
+            os.chdir(reply['cwd'])
+        environ = reply.get('environ', {})
+        for name in environ:
+            os.environ[name] = environ[name]
+        os.system(command)
+    return reply.get('code', 0)
+
 #----------------------------------------------------------------------
 # getopt: returns (options, args)
 #----------------------------------------------------------------------
@@ -1261,6 +2019,12 @@ def usage_help(prog):
     print('    %s -m                - display command macros'%prog)
     print('    %s -i                - interactive mode'%prog)
     print('    %s -f                - interactive mode with fzf'%prog)
+    print('    %s --serve           - start a daemon to serve requests'%prog)
+    print('    %s --serve=stop      - stop the running daemon'%prog)
+    print('    %s --serve=status    - check if the daemon is running'%prog)
+    print('options:')
+    print('    --no-cache  - do not use the persistent config cache')
+    print('    --no-server - do not forward requests to the daemon')
     # print('')
     return 0
 
@@ -1268,8 +2032,9 @@ def usage_help(prog):
 #----------------------------------------------------------------------
 # main entry
 #----------------------------------------------------------------------
-def main(args = None):
+def main(args = None, factory = None):
     args = args if args is not None else sys.argv
+    factory = factory and factory or TaskManager
     args = [ n for n in args ]
     prog = 'asynctask.py' if not args else args[0]
     prog = os.path.basename(prog and prog or 'asynctask.py')
@@ -1277,16 +2042,25 @@ def main(args = None):
     if len(args) <= 1:
         pretty.error('require task name, use %s -h for help'%prog)
         return 1
-    opts, args = getopt(args[1:])
+    argv = args[1:]
+    opts, args = getopt(argv)
     if 'h' in opts:
         usage_help(prog)
         return 0
+    if 'serve' in opts:
+        return server_main(opts['serve'])
+    if UNIX and ('no-server' not in opts):
+        if ('i' not in opts) and ('f' not in opts):
+            hr = client_main(argv)
+            if hr is not None:
+                return hr
+    cache = 'no-cache' not in opts
     if ('l' in opts) or ('L' in opts) or ('m' in opts) or ('M' in opts):
         path = '' if not args else args[0]
         if path and (not os.path.exists(path)):
             pretty.error('path not exists: %s'%path)
             return 2
-        tm = TaskManager(path)
+        tm = factory(path, cache)
         if 'raw' in opts:
             tm.task_list('L' in opts, True)
             return 0
@@ -1302,7 +2076,7 @@ def main(args = None):
         if path and (not os.path.exists(path)):
             pretty.error('path not exists: %s'%path)
             return 2
-        tm = TaskManager(path)
+        tm = factory(path, cache)
         tm.setup(opts)
         mode = 0 if 'i' in opts else 1
         tm.interactive(mode)
@@ -1317,7 +2091,7 @@ def main(args = None):
     if path and (not os.path.exists(path)):
         pretty.error('path not exists: %s'%path)
         return 2
-    tm = TaskManager(path)
+    tm = factory(path, cache)
     tm.config.shadow['+'] = {}
     tm.config.shadow['-'] = {}
     for key in opt2:
@@ -1335,6 +2109,7 @@ def main(args = None):
 #----------------------------------------------------------------------
 if __name__ == '__main__':
     def test1():
+        import pprint
         c = configure('d:/acm/github/vim/autoload')
         # cfg = c.read_ini(os.path.expanduser('~/.vim/tasks.ini'))
         # pprint.pprint(cfg)
@@ -1349,6 +2124,7 @@ if __name__ == '__main__':
         return 0
     def test2():
         # tm = TaskManager('d:/acm/github/vim/autoload/quickui/generic.vim')
+        import pprint
         tm = TaskManager('')
         print(tm.config.root)
         tm.config.load_tasks()
@@ -1365,6 +2141,7 @@ if __name__ == '__main__':
         pretty.error('something error')
         return 0
     def test4():
+        import pprint
         tm = TaskManager('d:/ACM/github/kcp/test.cpp')
         print(tm.config.filetype)
         pprint.pprint(tm.config.macros_expand())
@@ -1383,7 +2160,47 @@ if __name__ == '__main__':
     def test7():
         args = ['', '-m']
         main(args)
-    # test7()
+    def test8():
+        # cold start budget: modules imported on top of a bare interpreter
+        import subprocess, tempfile, shutil
+        forbidden = ['readline', 'tempfile', 'shutil', 'pprint', 'copy']
+        forbidden += ['hashlib', 'subprocess', 'threading', 'json']
+        budget = 10000    # microseconds
+        def imports(argv, cwd):
+            cmd = [sys.executable, '-X', 'importtime'] + argv
+            p = subprocess.Popen(cmd, cwd = cwd, stdin = subprocess.PIPE,
+                    stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+            _, err = p.communicate()
+            result = {}
+            for line in err.decode('utf-8', 'ignore').split('\n'):
+                parts = line.split('|')
+                if len(parts) != 3 or not line.startswith('import time:'):
+                    continue
+                name = parts[2].rstrip()
+                try:
+                    result[name.strip()] = (int(parts[1]), name[:2] == '  ')
+                except ValueError:
+                    pass
+            return result
+        home = tempfile.mkdtemp('asynctask')
+        with open(os.path.join(home, '.tasks'), 'w') as fp:
+            fp.write('[hello]\ncommand=echo hello\n')
+        base = imports(['-c', 'pass'], home)
+        script = os.path.abspath(__file__)
+        try:
+            for argv in (['-l'], ['-m'], ['hello']):
+                mods = imports([script, '--no-cache'] + argv, home)
+                extra = [ n for n in mods if n not in base ]
+                cost = sum([ mods[n][0] for n in extra if not mods[n][1] ])
+                bad = [ n for n in extra if n in forbidden ]
+                print(argv, 'imports:', extra, 'cost: %dus'%cost)
+                assert not bad, 'unexpected imports: %s'%bad
+                assert cost < budget, 'import budget exceeded: %dus'%cost
+        finally:
+            shutil.rmtree(home)
+        print('passed')
+        return 0
+    # test8()
     exit(main())
 
 